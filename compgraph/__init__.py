@@ -2,3 +2,4 @@ from .graph import Graph  # noqa: F401
 from . import operations  # noqa: F401
 from .external_sort import ExternalSort  # noqa: F401
 from .algorithms import word_count_graph  # noqa: F401
+from .json_rows import read_json_rows, write_json_rows  # noqa: F401
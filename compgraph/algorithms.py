@@ -1,16 +1,12 @@
 from compgraph import Graph
 from compgraph import operations
-import copy
 
 
 def word_count_graph(input_stream_name: str, text_column: str = 'text', count_column: str = 'count') -> Graph:
     """Constructs graph which counts words in text_column of all rows passed"""
     return Graph.graph_from_iter(input_stream_name) \
-        .map(operations.FilterPunctuation(text_column)) \
-        .map(operations.LowerCase(text_column)) \
-        .map(operations.Split(text_column)) \
-        .sort([text_column]) \
-        .reduce(operations.Count(count_column), [text_column]) \
+        .map(operations.TextNormalize(text_column)) \
+        .group_reduce(operations.Count(count_column), [text_column]) \
         .sort([count_column, text_column])
 
 
@@ -19,20 +15,15 @@ def inverted_index_graph(input_stream_name: str, doc_column: str = 'doc_id', tex
     """Constructs graph which calculates td-idf for every word/document pair"""
     graph = Graph.graph_from_iter(input_stream_name)
 
-    split_word = copy.deepcopy(graph) \
-        .map(operations.LowerCase(text_column)) \
-        .map(operations.FilterPunctuation(text_column)) \
-        .map(operations.Split(text_column))
+    split_word = graph.clone() \
+        .map(operations.TextNormalize(text_column))
 
     total_docs_column, docs_word_present = 'total_number_docs', 'docs_word_present'
 
     count_docs = graph.reduce(operations.Count(total_docs_column), [])
 
-    count_idf = copy.deepcopy(split_word) \
-        .sort([doc_column, text_column]) \
-        .reduce(operations.FirstReducer(), [doc_column, text_column]) \
-        .sort([text_column]) \
-        .reduce(operations.Count(docs_word_present), [text_column]) \
+    count_idf = split_word.clone() \
+        .group_reduce(operations.CountDistinct(doc_column, docs_word_present), [text_column]) \
         .join(operations.InnerJoiner(), count_docs, []) \
         .map(operations.InverseDocumentFrequency(total_docs_column, docs_word_present)) \
         .sort([text_column])
@@ -53,10 +44,8 @@ def pmi_graph(input_stream_name: str, doc_column: str = 'doc_id', text_column: s
     """Constructs graph which gives for every document the top 10 words ranked by pointwise mutual information"""
     graph = Graph.graph_from_iter(input_stream_name)
 
-    split_word = copy.deepcopy(graph) \
-        .map(operations.LowerCase(text_column)) \
-        .map(operations.FilterPunctuation(text_column)) \
-        .map(operations.Split(text_column)) \
+    split_word = graph.clone() \
+        .map(operations.TextNormalize(text_column)) \
         .sort([doc_column, text_column])
 
     result_column_count, result_column_tf, tf_total_docs_column = 'count_column', 'tf_all_column', 'tf'
@@ -67,7 +56,8 @@ def pmi_graph(input_stream_name: str, doc_column: str = 'doc_id', text_column: s
         .join(operations.OuterJoiner(), count_doc_words, [doc_column, text_column]) \
         .map(operations.Filter(lambda x: (x[result_column_count] >= 2) and (len(x[text_column]) >= 4)))
 
-    tf = words_filtered.sort([doc_column]) \
+    # words_filtered is already sorted by doc_column
+    tf = words_filtered \
         .reduce(operations.TermFrequency(text_column), [doc_column]) \
         .sort([text_column])
 
@@ -99,8 +89,7 @@ def yandex_maps_graph(input_stream_name_time: str, input_stream_name_length: str
     return graph_time \
         .sort([edge_id_column]) \
         .map(operations.RoadTime(enter_time_column, leave_time_column, 'road_time')) \
-        .map(operations.Hour(enter_time_column, hour_result_column)) \
-        .map(operations.Weekday(enter_time_column, weekday_result_column)) \
+        .map(operations.TimeFeatures(enter_time_column, weekday_result_column, hour_result_column)) \
         .join(operations.InnerJoiner(), graph_length, [edge_id_column]) \
         .sort([weekday_result_column, hour_result_column]) \
         .map(operations.Speed('distance', 'road_time', speed_result_column)) \
@@ -1,21 +1,151 @@
+from __future__ import annotations
+
+import heapq
+import os
+import pickle
+import tempfile
 import typing as tp
 
+from concurrent.futures import Future, ThreadPoolExecutor
 from multiprocessing import Pipe, Process, connection
-from operator import itemgetter
 
 from . import operations as ops
 
 
-def do_sort(endpoint: connection.Connection, keys: tuple[str, ...]) -> None:
-    rows = []
-    while True:
-        row = endpoint.recv()
-        if row is None:
-            break
-        rows.append(row)
-    rows.sort(key=itemgetter(*keys))
+DEFAULT_RUN_SIZE = 1 << 16
+DEFAULT_MERGE_FAN_IN = 64
+BLOCK_SIZE = 1024
+
+
+def iter_blocks(rows: ops.TRowsIterable, block_size: int = BLOCK_SIZE) -> tp.Generator[tp.List[ops.TRow], None, None]:
+    """Group rows into lists of at most block_size rows to pickle them at once"""
+    block: tp.List[ops.TRow] = []
     for row in rows:
-        endpoint.send(row)
+        block.append(row)
+        if len(block) >= block_size:
+            yield block
+            block = []
+    if block:
+        yield block
+
+
+class SpilledRows:
+    """Rows pickled in blocks to an anonymous temporary file, they can be read any number of times"""
+
+    def __init__(self, rows: ops.TRowsIterable | None = None) -> None:
+        """
+        :param rows: rows to spill, they may be also written later with write
+        """
+        self._file = tempfile.TemporaryFile()
+        if rows is not None:
+            self.write(rows)
+
+    def write(self, rows: ops.TRowsIterable) -> int:
+        """Append rows to the file
+        :return: number of written rows
+        """
+        size = 0
+        for block in iter_blocks(rows):
+            pickle.dump(block, self._file, pickle.HIGHEST_PROTOCOL)
+            size += len(block)
+        self._file.flush()
+        return size
+
+    def __iter__(self) -> ops.TRowsGenerator:
+        # every reader keeps its own position, so readers may interleave
+        end = os.fstat(self._file.fileno()).st_size
+        position = 0
+        while position < end:
+            self._file.seek(position)
+            block = pickle.load(self._file)
+            position = self._file.tell()
+            yield from block
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class SortedRun:
+    """Sorted rows spilled to an anonymous temporary file which are read once"""
+    def __init__(self, rows: SpilledRows, size: int, merge_count: int = 0) -> None:
+        """
+        :param rows: spilled sorted rows
+        :param size: number of rows in run
+        :param merge_count: number of merges rows of this run already went through
+        """
+        self.rows = rows
+        self.size = size
+        self.merge_count = merge_count
+
+    @staticmethod
+    def spill(rows: ops.TRowsIterable, merge_count: int = 0) -> SortedRun:
+        """Write already sorted rows to an anonymous temporary file"""
+        spilled_rows = SpilledRows()
+        size = spilled_rows.write(rows)
+        return SortedRun(spilled_rows, size, merge_count)
+
+    def __iter__(self) -> ops.TRowsGenerator:
+        """Read rows back and close the file"""
+        try:
+            yield from self.rows
+        finally:
+            self.rows.close()
+
+
+def write_run(run: tp.List[ops.TRow], key_getter: tp.Callable[[ops.TRow], tp.Any]) -> SortedRun:
+    """Sort run and spill it to an anonymous temporary file"""
+    run.sort(key=key_getter)
+    return SortedRun.spill(run)
+
+
+def pick_runs_to_merge(runs: tp.Sequence[SortedRun], merge_size: int) -> tuple[int, int]:
+    """Choose bounds of merge_size adjacent runs to merge next.
+    Runs which went through the fewest merges are preferred, then the smallest ones, then the most
+    recently written ones, which are the most likely to still be in the OS page cache. Only adjacent
+    runs are merged so that ties are still resolved in input order.
+    """
+    def window_cost(start: int) -> tuple[int, int, int]:
+        window = runs[start:start + merge_size]
+        return sum(run.merge_count for run in window), sum(run.size for run in window), -start
+
+    start = min(range(len(runs) - merge_size + 1), key=window_cost)
+    return start, start + merge_size
+
+
+def merge_runs(runs: tp.List[SortedRun], key_getter: tp.Callable[[ops.TRow], tp.Any], fan_in: int) -> None:
+    """Merge spilled runs in place until fewer than fan_in of them are left"""
+    while len(runs) >= fan_in:
+        # merge just as many runs as needed to leave fan_in - 1 of them
+        start, stop = pick_runs_to_merge(runs, min(fan_in, len(runs) - fan_in + 2))
+        merge_count = max(run.merge_count for run in runs[start:stop]) + 1
+        runs[start:stop] = [SortedRun.spill(heapq.merge(*runs[start:stop], key=key_getter), merge_count)]
+
+
+def do_sort(endpoint: connection.Connection, keys: tuple[str, ...], run_size: int, merge_fan_in: int) -> None:
+    key_getter = ops.key_getter(keys)
+    runs: tp.List[SortedRun] = []
+    run: tp.List[ops.TRow] = []
+    with ThreadPoolExecutor(max_workers=1) as writer:
+        # the previous full run is sorted and written in background while the next one is being received
+        pending_run: Future[SortedRun] | None = None
+        while True:
+            block = endpoint.recv()
+            if block is None:
+                break
+            for row in block:
+                run.append(row)
+                if len(run) >= run_size:
+                    if pending_run is not None:
+                        runs.append(pending_run.result())
+                    pending_run = writer.submit(write_run, run, key_getter)
+                    run = []
+        if pending_run is not None:
+            runs.append(pending_run.result())
+    # the in-memory run takes one more input in the final merge
+    merge_runs(runs, key_getter, merge_fan_in)
+    run.sort(key=key_getter)
+    for block in iter_blocks(heapq.merge(*runs, run, key=key_getter)):
+        endpoint.send(block)
     endpoint.send(None)
 
 
@@ -23,27 +153,50 @@ class ExternalSort(ops.Operation):
     """
     In order to not account materialization during sorting in main process memory consumption, we delegate
     sorting to a separate process.
-    This class illustrates cross-process streaming.
+    This class illustrates cross-process streaming, rows are streamed in pickled blocks.
+    Rows are sorted in runs of at most run_size rows, full runs are spilled to temporary files,
+    then runs are k-way merged at most merge_fan_in at a time.
     """
 
-    def __init__(self, keys: tp.Sequence[str]):
+    def __init__(self, keys: tp.Sequence[str], run_size: int = DEFAULT_RUN_SIZE,
+                 merge_fan_in: int = DEFAULT_MERGE_FAN_IN):
+        """
+        :param keys: sorting keys
+        :param run_size: maximum number of rows in one sorted run, at least 1
+        :param merge_fan_in: maximum number of runs merged at once, at least 2
+        """
+        if run_size < 1:
+            raise ValueError(f'run_size must be at least 1, got {run_size}')
+        if merge_fan_in < 2:
+            raise ValueError(f'merge_fan_in must be at least 2, got {merge_fan_in}')
         self.keys = keys
+        self.run_size = run_size
+        self.merge_fan_in = merge_fan_in
 
     def __call__(self, rows: ops.TRowsIterable, *args: tp.Any, **kwargs: tp.Any) -> ops.TRowsGenerator:
         local_endpoint, remote_endpoint = Pipe()
-        process = Process(target=do_sort, args=(remote_endpoint, self.keys))
+        process = Process(target=do_sort, args=(remote_endpoint, self.keys, self.run_size, self.merge_fan_in))
         process.start()
-        row_count_before = 0
-        for row in rows:
-            local_endpoint.send(row)
-            row_count_before += 1
-        local_endpoint.send(None)
-        row_count_after = 0
-        while True:
-            local_endpoint_row = local_endpoint.recv()
-            if local_endpoint_row is None:
-                break
-            yield local_endpoint_row
-            row_count_after += 1
-        assert row_count_before == row_count_after
-        process.join()
+        # only sort process keeps its endpoint, so its death is seen as end of pipe instead of a hang
+        remote_endpoint.close()
+        try:
+            row_count_before = 0
+            for block in iter_blocks(rows):
+                local_endpoint.send(block)
+                row_count_before += len(block)
+            local_endpoint.send(None)
+            row_count_after = 0
+            while True:
+                local_endpoint_block = local_endpoint.recv()
+                if local_endpoint_block is None:
+                    break
+                yield from local_endpoint_block
+                row_count_after += len(local_endpoint_block)
+            assert row_count_before == row_count_after
+            process.join()
+        finally:
+            # input rows may fail or output may be left unread, then sort process would wait for the pipe forever
+            if process.is_alive():
+                process.terminate()
+                process.join()
+            local_endpoint.close()
@@ -1,8 +1,145 @@
 from __future__ import annotations
 
+import multiprocessing
+import traceback
 import typing as tp
+from multiprocessing import connection
+from collections import Counter, defaultdict
 from . import operations as ops
-from .external_sort import ExternalSort
+from .external_sort import ExternalSort, SpilledRows
+
+TOperationsPrefix = tp.Tuple[ops.Operation, ...]
+
+
+def fuse_maps(operations: tp.Sequence[ops.Operation]) -> tp.List[ops.Operation]:
+    """Replace every chain of consecutive map operations with one fused operation
+    :param operations: operations to fuse
+    """
+    fused_operations: tp.List[ops.Operation] = []
+    map_chain: tp.List[ops.Map] = []
+
+    def flush_map_chain() -> None:
+        if len(map_chain) == 1:
+            fused_operations.append(map_chain[0])
+        elif map_chain:
+            fused_operations.append(ops.FusedMap([operation.mapper for operation in map_chain]))
+        map_chain.clear()
+
+    for operation in operations:
+        if isinstance(operation, ops.Map):
+            map_chain.append(operation)
+        else:
+            flush_map_chain()
+            fused_operations.append(operation)
+    flush_map_chain()
+    return fused_operations
+
+
+def is_map_chain(operations: tp.Sequence[ops.Operation]) -> bool:
+    """Whether operations only read rows from source and map them.
+    Rerunning such chain is cheaper than spilling its output and replaying it
+    :param operations: operations to check
+    """
+    return all(isinstance(operation, (ops.ReadIterFactory, ops.Read, ops.Map)) for operation in operations)
+
+
+def find_shared_prefixes(prefix_uses: tp.Counter[TOperationsPrefix]) -> tp.Set[TOperationsPrefix]:
+    """Find operation prefixes which outputs are worth computing once and reusing
+    :param prefix_uses: how many times every operations prefix is run
+    """
+    extensions: tp.DefaultDict[TOperationsPrefix, tp.List[TOperationsPrefix]] = defaultdict(list)
+    for prefix in prefix_uses:
+        if len(prefix) > 1:
+            extensions[prefix[:-1]].append(prefix)
+
+    shared_prefixes: tp.Set[TOperationsPrefix] = set()
+    executions: tp.Dict[TOperationsPrefix, int] = {}
+    for prefix in sorted(prefix_uses, key=len, reverse=True):
+        # a shared extension is computed once, so it needs its prefix only once
+        own_uses = prefix_uses[prefix] - sum(prefix_uses[extension] for extension in extensions[prefix])
+        executions[prefix] = own_uses + sum(1 if extension in shared_prefixes else executions[extension]
+                                            for extension in extensions[prefix])
+        if executions[prefix] > 1 and not is_map_chain(prefix):
+            shared_prefixes.add(prefix)
+    return shared_prefixes
+
+
+class ForkedBranch:
+    """Graph run in a forked process concurrently with the rest of the graph, its output is spilled
+    to a temporary file and read once the process finishes.
+    Exception raised by the branch is passed to the parent process and raised on reading the output.
+    Side effects of operations of the branch, such as changes of mapper attributes, never reach the parent process
+    """
+
+    def __init__(self, graph: Graph, kwargs: tp.Dict[str, tp.Any]) -> None:
+        """
+        :param graph: graph to run
+        :param kwargs: data sources
+        """
+        self._rows = SpilledRows()
+        self._errors, errors_sender = multiprocessing.Pipe(duplex=False)
+        # forked process inherits graph and data sources, so they do not need to be picklable
+        self._process = multiprocessing.get_context('fork').Process(
+            target=self._run, args=(graph, kwargs, errors_sender))
+        self._process.start()
+        errors_sender.close()
+
+    def _run(self, graph: Graph, kwargs: tp.Dict[str, tp.Any], errors_sender: connection.Connection) -> None:
+        try:
+            self._rows.write(graph.run(**kwargs))
+        except BaseException as error:
+            # notes are available since Python 3.11, on older versions only the exception itself is passed
+            if hasattr(error, 'add_note'):
+                error.add_note(f'Raised in forked graph branch:\n{traceback.format_exc()}')
+            try:
+                errors_sender.send(error)
+            except Exception:
+                # exception can not be pickled, so only its description is passed
+                errors_sender.send(RuntimeError(f'Graph branch failed with {error!r}'))
+        else:
+            errors_sender.send(None)
+        finally:
+            errors_sender.close()
+
+    def __iter__(self) -> ops.TRowsGenerator:
+        try:
+            error = self._errors.recv()
+        except EOFError:
+            # process was killed before it reported the result
+            error = None
+        self._process.join()
+        if error is not None:
+            raise error
+        if self._process.exitcode != 0:
+            raise RuntimeError(f'Graph branch failed with exit code {self._process.exitcode}')
+        yield from self._rows
+
+    def close(self) -> None:
+        if self._process.is_alive():
+            self._process.terminate()
+        self._process.join()
+        self._errors.close()
+        self._rows.close()
+
+
+class RunContext:
+    """State shared by all branches of one graph run"""
+
+    def __init__(self, kwargs: tp.Dict[str, tp.Any], shared_prefixes: tp.Set[TOperationsPrefix]) -> None:
+        """
+        :param kwargs: data sources
+        :param shared_prefixes: operation prefixes to compute once
+        """
+        self.kwargs = kwargs
+        self.shared_prefixes = shared_prefixes
+        self.materialized: tp.Dict[TOperationsPrefix, SpilledRows] = {}
+        self.forked_branches: tp.List[ForkedBranch] = []
+
+    def close(self) -> None:
+        for rows in self.materialized.values():
+            rows.close()
+        for branch in self.forked_branches:
+            branch.close()
 
 
 class Graph:
@@ -39,6 +176,10 @@ class Graph:
         operation = ops.Read(filename, parser)
         return Graph([operation])
 
+    def clone(self) -> Graph:
+        """Construct new graph with the same operations to extend it independently of this one"""
+        return Graph(list(self.operations), list(self.graphs_to_join))
+
     def map(self, mapper: ops.Mapper) -> Graph:
         """Construct new graph extended with map operation with particular mapper
         :param mapper: mapper to use
@@ -54,6 +195,15 @@ class Graph:
         operation = ops.Reduce(reducer, keys)
         return Graph(self.operations + [operation], self.graphs_to_join)
 
+    def group_reduce(self, reducer: ops.Reducer, keys: tp.Sequence[str]) -> Graph:
+        """Construct new graph extended with reduce operation which does not need rows sorted by keys
+        Rows are grouped in memory, groups are reduced in order of their first row, output is not sorted by keys
+        :param reducer: reducer to use
+        :param keys: keys for grouping
+        """
+        operation = ops.HashReduce(reducer, keys)
+        return Graph(self.operations + [operation], self.graphs_to_join)
+
     def sort(self, keys: tp.Sequence[str]) -> Graph:
         """Construct new graph extended with sort operation
         :param keys: sorting keys (typical is tuple of strings)
@@ -61,24 +211,93 @@ class Graph:
         operation = ExternalSort(keys)
         return Graph(self.operations + [operation], self.graphs_to_join)
 
-    def join(self, joiner: ops.Joiner, join_graph: Graph, keys: tp.Sequence[str]) -> Graph:
+    def join(self, joiner: ops.Joiner, join_graph: Graph, keys: tp.Sequence[str],
+             broadcast_rows: int = ops.DEFAULT_BROADCAST_ROWS) -> Graph:
         """Construct new graph extended with join operation with another graph
         :param joiner: join strategy to use
         :param join_graph: other graph to join with
         :param keys: keys for grouping
+        :param broadcast_rows: maximum size of join_graph output to join by hash table instead of merging
         """
-        operation = ops.Join(joiner, keys)
+        operation = ops.Join(joiner, keys, broadcast_rows)
         return Graph(self.operations + [operation], self.graphs_to_join + [join_graph])
 
     def run(self, **kwargs: tp.Any) -> ops.TRowsIterable:
-        """Single method to start execution; data sources passed as kwargs"""
-        index_with_data, join_index = 0, 0
-        passed_data = self.operations[index_with_data](**kwargs)
-        for do_operation in self.operations[index_with_data + 1:]:
+        """Single method to start execution; data sources passed as kwargs
+        Operation prefixes shared by several branches of the graph are computed once,
+        other joined branches are computed in forked processes when possible
+        """
+        prefix_uses: tp.Counter[TOperationsPrefix] = Counter()
+        self._count_prefix_uses(prefix_uses)
+        context = RunContext(kwargs, find_shared_prefixes(prefix_uses))
+        try:
+            yield from self._run(len(self.operations), context)
+        finally:
+            context.close()
+
+    def _count_prefix_uses(self, prefix_uses: tp.Counter[TOperationsPrefix]) -> None:
+        """Count how many times every operations prefix of this graph and graphs it joins with is run"""
+        seen_length = 0
+        for length in range(1, len(self.operations) + 1):
+            prefix = tuple(self.operations[:length])
+            if prefix_uses[prefix]:
+                seen_length = length
+            prefix_uses[prefix] += 1
+
+        join_index = 0
+        for index, operation in enumerate(self.operations):
+            if isinstance(operation, ops.Join):
+                # graphs joined inside an already counted prefix are run along with it
+                if index >= seen_length:
+                    self.graphs_to_join[join_index]._count_prefix_uses(prefix_uses)
+                join_index += 1
+
+    def _uses_shared_prefixes(self, shared_prefixes: tp.Set[TOperationsPrefix]) -> bool:
+        """Whether graph or any graph it joins with runs one of shared prefixes"""
+        return any(tuple(self.operations[:length]) in shared_prefixes
+                   for length in range(1, len(self.operations) + 1)) or \
+            any(graph._uses_shared_prefixes(shared_prefixes) for graph in self.graphs_to_join)
+
+    def _can_fork(self, shared_prefixes: tp.Set[TOperationsPrefix]) -> bool:
+        """Whether graph is worth running in a forked process and is independent from the rest of the run"""
+        if 'fork' not in multiprocessing.get_all_start_methods():
+            return False
+        if is_map_chain(self.operations):
+            return False
+        return not self._uses_shared_prefixes(shared_prefixes)
+
+    def _run(self, length: int, context: RunContext, reuse_whole: bool = True) -> ops.TRowsIterable:
+        """Build stream of rows produced by first length operations of graph
+        :param length: number of operations to run
+        :param context: state of current run
+        :param reuse_whole: whether output of all length operations may be taken from materialized ones
+        """
+        operations = self.operations[:length]
+        for prefix_length in range(length if reuse_whole else length - 1, 0, -1):
+            prefix = tuple(operations[:prefix_length])
+            if prefix in context.shared_prefixes:
+                if prefix not in context.materialized:
+                    context.materialized[prefix] = SpilledRows(
+                        self._run(prefix_length, context, reuse_whole=False))
+                passed_data = iter(context.materialized[prefix])
+                break
+        else:
+            prefix_length = 1
+            passed_data = operations[0](**context.kwargs)
+
+        join_index = sum(isinstance(operation, ops.Join) for operation in operations[:prefix_length])
+        for do_operation in fuse_maps(operations[prefix_length:]):
             if not isinstance(do_operation, ops.Join):
                 passed_data = do_operation(passed_data)
             else:
-                data_to_join = self.graphs_to_join[join_index].run(**kwargs)
+                join_graph = self.graphs_to_join[join_index]
+                data_to_join: ops.TRowsIterable
+                if join_graph._can_fork(context.shared_prefixes):
+                    branch = ForkedBranch(join_graph, context.kwargs)
+                    context.forked_branches.append(branch)
+                    data_to_join = iter(branch)
+                else:
+                    data_to_join = join_graph._run(len(join_graph.operations), context)
                 passed_data = do_operation(passed_data, data_to_join)
                 join_index += 1
-        yield from passed_data
+        return passed_data
@@ -0,0 +1,30 @@
+import ast
+import json
+import typing as tp
+from itertools import chain
+from . import operations as ops
+
+
+def read_json_rows(file: tp.TextIO) -> ops.TRowsGenerator:
+    """Read rows from file in JSON Lines format, one JSON object per line
+    A single list of rows written by str() is also accepted for backward compatibility
+    :param file: file to read from
+    """
+    first_line = file.readline()
+    if first_line.lstrip().startswith('['):
+        yield from ast.literal_eval(first_line + file.read())
+        return
+    for line in chain([first_line], file):
+        if line.strip():
+            yield json.loads(line)
+
+
+def write_json_rows(file: tp.TextIO, rows: ops.TRowsIterable) -> None:
+    """Write rows to file in JSON Lines format, one JSON object per line
+    :param file: file to write to
+    :param rows: rows to write
+    """
+    dumps = json.JSONEncoder(ensure_ascii=False).encode
+    for row in rows:
+        file.write(dumps(row))
+        file.write('\n')
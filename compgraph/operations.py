@@ -1,11 +1,15 @@
 from abc import abstractmethod, ABC
-from collections import defaultdict
-from copy import deepcopy
-from heapq import nlargest
-from itertools import groupby
-from math import log, radians, asin, sin, pow, sqrt, cos
+from collections import Counter, defaultdict
+from functools import lru_cache
+from heapq import heappush, heapreplace
+from itertools import chain, groupby, islice
+from math import log, pi, asin, sin, sqrt, cos
+from operator import itemgetter
 import datetime
+import queue
 import string
+import sys
+import threading
 import typing as tp
 import re
 
@@ -13,6 +17,55 @@ TRow = dict[str, tp.Any]
 TRowsIterable = tp.Iterable[TRow]
 TRowsGenerator = tp.Generator[TRow, None, None]
 
+DEFAULT_BROADCAST_ROWS = 100_000
+READ_CHUNK_SIZE = 1 << 16
+READ_PREFETCH_CHUNKS = 4
+
+_DEG_TO_RAD = pi / 180
+# 0001-01-01 is Monday
+_WEEKDAYS = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+_US_PER_SECOND = 1_000_000
+_US_PER_HOUR = 3600 * _US_PER_SECOND
+_US_PER_DAY = 24 * _US_PER_HOUR
+_PUNCT_DROP_TABLE = str.maketrans('', '', string.punctuation)
+_WORD_PATTERN = re.compile(r'\w+')
+
+
+class _PosInf:
+    """Key greater than any other key, marks end of groups in merge join"""
+    def __lt__(self, other: tp.Any) -> bool:
+        return False
+
+    def __gt__(self, other: tp.Any) -> bool:
+        return other is not self
+
+
+_END_KEY = _PosInf()
+
+
+def key_getter(keys: tp.Sequence[str]) -> tp.Callable[[TRow], tp.Any]:
+    """Build function extracting keys from row, rows with equal keys get equal comparable results
+    :param keys: names of key columns
+    """
+    if not keys:
+        return lambda row: ()
+    return itemgetter(*keys)
+
+
+def _key_row(keys: tp.Sequence[str], key: tp.Any) -> TRow:
+    """Build row with key columns from key extracted by key_getter(keys)"""
+    return dict(zip(keys, key)) if len(keys) != 1 else {keys[0]: key}
+
+
+@lru_cache(maxsize=1 << 16)
+def _parse_ts(row_time: str) -> int:
+    """Parse datetime in %Y%m%dT%H%M%S.%f format by fixed positions, much faster than strptime
+    :return: microseconds since 0001-01-01 00:00:00, so differences of timestamps are plain subtractions
+    """
+    days = datetime.date(int(row_time[0:4]), int(row_time[4:6]), int(row_time[6:8])).toordinal() - 1
+    seconds = int(row_time[9:11]) * 3600 + int(row_time[11:13]) * 60 + int(row_time[13:15])
+    return (days * 86400 + seconds) * _US_PER_SECOND + int(row_time[16:22].ljust(6, '0'))
+
 
 class Operation(ABC):
     @abstractmethod
@@ -20,15 +73,54 @@ class Operation(ABC):
         pass
 
 
+def _prefetch_lines(filename: str) -> tp.Generator[tp.List[str], None, None]:
+    """Read file by chunks of lines in a background thread, so reading overlaps with processing of read lines
+    :param filename: filename to read from
+    """
+    chunks: queue.Queue[tp.List[str] | BaseException] = queue.Queue(READ_PREFETCH_CHUNKS)
+    stopped = threading.Event()
+
+    def read() -> None:
+        try:
+            with open(filename) as f:
+                while not stopped.is_set():
+                    lines = f.readlines(READ_CHUNK_SIZE)
+                    chunks.put(lines)
+                    if not lines:
+                        return
+        except BaseException as error:
+            chunks.put(error)
+
+    reader = threading.Thread(target=read, daemon=True)
+    reader.start()
+    try:
+        while True:
+            chunk = chunks.get()
+            if isinstance(chunk, BaseException):
+                raise chunk
+            if not chunk:
+                return
+            yield chunk
+    finally:
+        # reader may wait for a free slot in the queue, so the queue is drained until it notices the stop
+        stopped.set()
+        while reader.is_alive():
+            try:
+                chunks.get(timeout=0.01)
+            except queue.Empty:
+                pass
+
+
 class Read(Operation):
     def __init__(self, filename: str, parser: tp.Callable[[str], TRow]) -> None:
         self.filename = filename
         self.parser = parser
 
     def __call__(self, *args: tp.Any, **kwargs: tp.Any) -> TRowsGenerator:
-        with open(self.filename) as f:
-            for line in f:
-                yield self.parser(line)
+        for lines in _prefetch_lines(self.filename):
+            for line in lines:
+                # parsers usually create new key strings for every line, interning lets rows share them
+                yield {sys.intern(key): value for key, value in self.parser(line).items()}
 
 
 class ReadIterFactory(Operation):
@@ -57,10 +149,22 @@ class Map(Operation):
     def __init__(self, mapper: Mapper) -> None:
         self.mapper = mapper
 
+    def __call__(self, rows: TRowsIterable, *args: tp.Any, **kwargs: tp.Any) -> TRowsGenerator:
+        # the loop over rows runs in C, only the mapper itself is called from Python
+        yield from chain.from_iterable(map(self.mapper, rows))
+
+
+class FusedMap(Operation):
+    """Apply a chain of mappers to every row in a single pass over the stream"""
+    def __init__(self, mappers: tp.Sequence[Mapper]) -> None:
+        self.mappers = mappers
+
     def __call__(self, rows: TRowsIterable, *args: tp.Any, **kwargs: tp.Any) -> TRowsGenerator:
         for row in rows:
-            for mapped_row in self.mapper(row):
-                yield mapped_row
+            mapped_rows = [row]
+            for mapper in self.mappers:
+                mapped_rows = [mapped_row for current_row in mapped_rows for mapped_row in mapper(current_row)]
+            yield from mapped_rows
 
 
 class Reducer(ABC):
@@ -72,16 +176,42 @@ class Reducer(ABC):
         """
         pass
 
+    def reduce_unsorted(self, group_key: tuple[str, ...], rows: TRowsIterable) -> TRowsGenerator:
+        """Reduce rows of all groups at once, rows do not need to be sorted by group_key.
+        Groups are reduced in order of their first row. Rows of every group are collected in memory
+        and passed to the reducer, reducers which do not need whole groups may aggregate them cheaper
+        :param group_key: keys for grouping
+        :param rows: table rows
+        """
+        get_key = key_getter(group_key)
+        groups: tp.DefaultDict[tp.Any, tp.List[TRow]] = defaultdict(list)
+        for row in rows:
+            groups[get_key(row)].append(row)
+        for reduce_group in groups.values():
+            yield from self(group_key, reduce_group)
+
 
 class Reduce(Operation):
+    def __init__(self, reducer: Reducer, keys: tp.Sequence[str]) -> None:
+        self.reducer = reducer
+        self.keys = keys
+        self._key_getter = key_getter(keys)
+
+    def __call__(self, rows: TRowsIterable, *args: tp.Any, **kwargs: tp.Any) -> TRowsGenerator:
+        group_key = tuple(self.keys)
+        for _, reduce_group in groupby(rows, key=self._key_getter):
+            yield from self.reducer(group_key, reduce_group)
+
+
+class HashReduce(Operation):
+    """Reduce rows grouped by hash of keys, so rows do not need to be sorted by keys.
+    Groups are reduced in order of their first row, so output is not sorted by keys"""
     def __init__(self, reducer: Reducer, keys: tp.Sequence[str]) -> None:
         self.reducer = reducer
         self.keys = keys
 
     def __call__(self, rows: TRowsIterable, *args: tp.Any, **kwargs: tp.Any) -> TRowsGenerator:
-        for reduce_key, reduce_group in groupby(rows, key=lambda key_elem: tuple(key_elem[key] for key in self.keys)):
-            for reduced_row in self.reducer(tuple(self.keys), reduce_group):
-                yield reduced_row
+        yield from self.reducer.reduce_unsorted(tuple(self.keys), rows)
 
 
 class Joiner(ABC):
@@ -89,6 +219,8 @@ class Joiner(ABC):
     def __init__(self, suffix_a: str = '_1', suffix_b: str = '_2') -> None:
         self._a_suffix = suffix_a
         self._b_suffix = suffix_b
+        # rows of one table usually share columns, so columns to suffix are computed once per pair of schemas
+        self._non_key_columns: tp.Dict[tp.Tuple[tp.Tuple[str, ...], ...], tp.FrozenSet[str]] = {}
 
     @abstractmethod
     def __call__(self, keys: tp.Sequence[str], rows_a: TRowsIterable, rows_b: TRowsIterable) -> TRowsGenerator:
@@ -100,50 +232,92 @@ class Joiner(ABC):
         pass
 
     def join(self, keys: tp.Sequence[str], row_a: TRow, row_b: TRow) -> TRow:
-        non_key_columns = set(row_a.keys()).intersection(row_b.keys()) - set(keys)
-
-        def merge_common_columns(row: TRow, suffix: str) -> TRow:
-            return {key + suffix: row[key] for key in non_key_columns}
-
-        def merge_non_key_columns(row: TRow) -> TRow:
-            return {key: row[key] for key in row.keys() if key not in non_key_columns}
-
-        result_row = {}
-        result_row.update(merge_non_key_columns(row_a))
-        result_row.update(merge_non_key_columns(row_b))
-        result_row.update(merge_common_columns(row_a, self._a_suffix))
-        result_row.update(merge_common_columns(row_b, self._b_suffix))
+        schemas = (tuple(row_a), tuple(row_b), tuple(keys))
+        non_key_columns = self._non_key_columns.get(schemas)
+        if non_key_columns is None:
+            non_key_columns = frozenset((row_a.keys() & row_b.keys()) - set(keys))
+            self._non_key_columns[schemas] = non_key_columns
+        if not non_key_columns:
+            result_row = row_a.copy()
+            result_row.update(row_b)
+            return result_row
+
+        result_row = {key: value for key, value in row_a.items() if key not in non_key_columns}
+        for key, value in row_b.items():
+            if key not in non_key_columns:
+                result_row[key] = value
+        for key in non_key_columns:
+            result_row[key + self._a_suffix] = row_a[key]
+        for key in non_key_columns:
+            result_row[key + self._b_suffix] = row_b[key]
         return result_row
 
 
 class Join(Operation):
-    def __init__(self, joiner: Joiner, keys: tp.Sequence[str]):
+    def __init__(self, joiner: Joiner, keys: tp.Sequence[str], broadcast_rows: int = DEFAULT_BROADCAST_ROWS):
+        """
+        :param joiner: join strategy to use
+        :param keys: keys for grouping
+        :param broadcast_rows: maximum number of right rows to join by hash table instead of merging,
+            only inner and left joins, which ignore right rows without a match, are joined this way
+        """
         self.keys = keys
         self.joiner = joiner
+        self.broadcast_rows = broadcast_rows
+        self._key_getter = key_getter(keys)
 
     def __call__(self, rows: TRowsIterable, *args: tp.Any, **kwargs: tp.Any) -> TRowsGenerator:
-        first_grouper = groupby(rows, key=lambda row: tuple(row[k] for k in self.keys))
-        second_grouper = groupby(args[0], key=lambda row: tuple(row[k] for k in self.keys))
-        temp_first_group = next(first_grouper, (None, None))
-        first_key, first_group = temp_first_group
-        temp_second_group = next(second_grouper, (None, None))
-        second_key, second_group = temp_second_group
-
-        while first_key is not None or second_key is not None:
-            if first_group is not None and first_key is not None and (second_key is None or first_key < second_key):
-                for r in self.joiner(keys=self.keys, rows_a=first_group, rows_b=[{}]):
-                    yield r
-                first_key, first_group = next(first_grouper, (None, None))
-            elif second_key is not None and second_group is not None and (first_key is None or second_key < first_key):
-                for r in self.joiner(self.keys, [{}], second_group):
-                    yield r
-                second_key, second_group = next(second_grouper, (None, None))
+        rows_b = iter(args[0])
+        if isinstance(self.joiner, (InnerJoiner, LeftJoiner)):
+            small_rows_b = list(islice(rows_b, self.broadcast_rows + 1))
+            if len(small_rows_b) <= self.broadcast_rows:
+                table_b = self._build_table(small_rows_b)
+                if table_b is not None:
+                    yield from self._hash_join(rows, small_rows_b, table_b)
+                    return
+            rows_b = chain(small_rows_b, rows_b)
+        yield from self._merge_join(rows, rows_b)
+
+    def _build_table(self, rows_b: tp.List[TRow]) -> tp.Dict[tp.Any, tp.List[TRow]] | None:
+        """Group right rows by keys, None if some keys are unhashable and rows can be only merged"""
+        table_b: tp.DefaultDict[tp.Any, tp.List[TRow]] = defaultdict(list)
+        try:
+            for row in rows_b:
+                table_b[self._key_getter(row)].append(row)
+        except TypeError:
+            return None
+        return table_b
+
+    def _hash_join(self, rows_a: TRowsIterable, rows_b: tp.List[TRow],
+                   table_b: tp.Dict[tp.Any, tp.List[TRow]]) -> TRowsGenerator:
+        for key, group_a in groupby(rows_a, key=self._key_getter):
+            try:
+                matched_rows_b = table_b.get(key, [{}])
+            except TypeError:
+                # unhashable left key may still be equal to some right key
+                matched_rows_b = [row for row in rows_b if self._key_getter(row) == key] or [{}]
+            yield from self.joiner(self.keys, group_a, matched_rows_b)
+
+    def _merge_join(self, rows_a: TRowsIterable, rows_b: TRowsIterable) -> TRowsGenerator:
+        # single key is extracted as is, so None is a valid key and cannot mark end of groups.
+        # Equal keys are checked first, as values such as None are equal but can not be ordered
+        no_group: tp.Tuple[tp.Any, TRowsIterable] = (_END_KEY, ())
+        first_grouper = groupby(rows_a, key=self._key_getter)
+        second_grouper = groupby(rows_b, key=self._key_getter)
+        first_key, first_group = next(first_grouper, no_group)
+        second_key, second_group = next(second_grouper, no_group)
+
+        while first_key is not _END_KEY or second_key is not _END_KEY:
+            if first_key == second_key:
+                yield from self.joiner(self.keys, first_group, second_group)
+                first_key, first_group = next(first_grouper, no_group)
+                second_key, second_group = next(second_grouper, no_group)
+            elif first_key < second_key:
+                yield from self.joiner(self.keys, first_group, [{}])
+                first_key, first_group = next(first_grouper, no_group)
             else:
-                if first_group is not None and second_group is not None:
-                    for r in self.joiner(self.keys, first_group, second_group):
-                        yield r
-                    first_key, first_group = next(first_grouper, (None, None))
-                    second_key, second_group = next(second_grouper, (None, None))
+                yield from self.joiner(self.keys, [{}], second_group)
+                second_key, second_group = next(second_grouper, no_group)
 
 
 # Dummy operators
@@ -175,8 +349,8 @@ class FilterPunctuation(Mapper):
         self.column = column
 
     def __call__(self, row: TRow) -> TRowsGenerator:
-        copied_row: TRow = deepcopy(row)
-        copied_row[self.column] = ''.join([char for char in row[self.column] if char not in string.punctuation])
+        copied_row: TRow = row.copy()
+        copied_row[self.column] = row[self.column].translate(_PUNCT_DROP_TABLE)
         yield copied_row
 
 
@@ -193,7 +367,7 @@ class LowerCase(Mapper):
         return txt.lower()
 
     def __call__(self, row: TRow) -> TRowsGenerator:
-        copied_row: TRow = deepcopy(row)
+        copied_row: TRow = row.copy()
         copied_row[self.column] = self._lower_case(row[self.column])
         yield copied_row
 
@@ -214,16 +388,23 @@ class HaversineDistance(Mapper):
 
     @staticmethod
     def haversine(theta: float) -> float:
-        return pow(sin(theta / 2), 2)
+        half_sin = sin(theta * 0.5)
+        return half_sin * half_sin
 
     def __call__(self, row: TRow) -> TRowsGenerator:
-        start_lon, start_lat = [radians(start_position) for start_position in row[self.start_coords]]
-        end_lon, end_lat = [radians(end_position) for end_position in row[self.end_coords]]
+        start, end = row[self.start_coords], row[self.end_coords]
+        if start == end:
+            yield row | {self.result_column: 0.0}
+            return
+        start_lon, start_lat = start
+        end_lon, end_lat = end
+        start_lon, start_lat = start_lon * _DEG_TO_RAD, start_lat * _DEG_TO_RAD
+        end_lon, end_lat = end_lon * _DEG_TO_RAD, end_lat * _DEG_TO_RAD
 
         archaversine = asin(sqrt(self.haversine(end_lat - start_lat) +
                                  cos(start_lat) * cos(end_lat) * self.haversine(end_lon - start_lon)))
 
-        copied_row: TRow = deepcopy(row)
+        copied_row: TRow = row.copy()
         copied_row[self.result_column] = 2 * self.R * archaversine
         yield copied_row
 
@@ -246,11 +427,10 @@ class RoadTime(Mapper):
         self.result_column = result_column
 
     def __call__(self, row: TRow) -> TRowsGenerator:
-        formatted_enter_time = datetime.datetime.strptime(row[self.enter_time], "%Y%m%dT%H%M%S.%f")
-        formatted_leave_time = datetime.datetime.strptime(row[self.leave_time], "%Y%m%dT%H%M%S.%f")
+        road_time = _parse_ts(row[self.leave_time]) - _parse_ts(row[self.enter_time])
 
-        copied_row: TRow = deepcopy(row)
-        copied_row[self.result_column] = (formatted_leave_time - formatted_enter_time).total_seconds()
+        copied_row: TRow = row.copy()
+        copied_row[self.result_column] = road_time / _US_PER_SECOND
         yield copied_row
 
 
@@ -266,11 +446,10 @@ class Weekday(Mapper):
 
     @staticmethod
     def get_weekday(row_time: tp.Any) -> str:
-        all_weekdays = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
-        return all_weekdays[datetime.datetime.strptime(row_time, "%Y%m%dT%H%M%S.%f").weekday()]
+        return _WEEKDAYS[_parse_ts(row_time) // _US_PER_DAY % 7]
 
     def __call__(self, row: TRow) -> TRowsGenerator:
-        copied_row: TRow = deepcopy(row)
+        copied_row: TRow = row.copy()
         copied_row[self.result_column] = self.get_weekday(row[self.datetime_column])
         yield copied_row
 
@@ -287,14 +466,34 @@ class Hour(Mapper):
 
     @staticmethod
     def get_hour(row_time: tp.Any) -> int:
-        return datetime.datetime.strptime(row_time, "%Y%m%dT%H%M%S.%f").hour
+        # hour has a fixed position in %Y%m%dT%H%M%S.%f format
+        return int(row_time[9:11])
 
     def __call__(self, row: TRow) -> TRowsGenerator:
-        copied_row: TRow = deepcopy(row)
+        copied_row: TRow = row.copy()
         copied_row[self.result_column] = self.get_hour(row[self.datetime_column])
         yield copied_row
 
 
+class TimeFeatures(Mapper):
+    """Calculates weekday and hour of datetime parsing it once"""
+    def __init__(self, datetime_column: str = 'datetime', weekday_column: str = 'weekday',
+                 hour_column: str = 'hour') -> None:
+        """
+        :param datetime_column: name of column with datetime
+        :param weekday_column: name of result column with weekday
+        :param hour_column: name of result column with hour
+        """
+        self.datetime_column = datetime_column
+        self.weekday_column = weekday_column
+        self.hour_column = hour_column
+
+    def __call__(self, row: TRow) -> TRowsGenerator:
+        row_time = _parse_ts(row[self.datetime_column])
+        yield row | {self.weekday_column: _WEEKDAYS[row_time // _US_PER_DAY % 7],
+                     self.hour_column: row_time // _US_PER_HOUR % 24}
+
+
 class Speed(Mapper):
     """Calculates the speed by time and distance in kilometers per hour"""
     def __init__(self, distance: str = 'distance', time: str = 'time', result_column: str = 'speed') -> None:
@@ -309,8 +508,9 @@ class Speed(Mapper):
 
     def __call__(self, row: TRow) -> TRowsGenerator:
         from_meters_per_second = 3600
-        copied_row: TRow = deepcopy(row)
-        calculated_speed = row[self.distance] / row[self.time] * from_meters_per_second
+        copied_row: TRow = row.copy()
+        # zero time means the edge was passed at once, there is no speed to measure
+        calculated_speed = row[self.distance] / row[self.time] * from_meters_per_second if row[self.time] else 0.0
         copied_row[self.result_column] = calculated_speed
         yield copied_row
 
@@ -326,10 +526,17 @@ class InverseDocumentFrequency(Mapper):
         self.docs_column = docs_column
         self.total_docs_column = total_docs_column
         self.result_column = result_column
+        # total number of docs is usually the same in consecutive rows, so its last log is kept
+        self._last_total_docs: tp.Any = None
+        self._last_log_total_docs = 0.0
 
     def __call__(self, row: TRow) -> TRowsGenerator:
-        copied_row: TRow = deepcopy(row)
-        copied_row[self.result_column] = log(row[self.total_docs_column]) - log(row[self.docs_column])
+        total_docs = row[self.total_docs_column]
+        if total_docs != self._last_total_docs:
+            self._last_total_docs = total_docs
+            self._last_log_total_docs = log(total_docs)
+        copied_row: TRow = row.copy()
+        copied_row[self.result_column] = self._last_log_total_docs - log(row[self.docs_column])
         yield copied_row
 
 
@@ -342,17 +549,36 @@ class Split(Mapper):
         """
         self.column = column
         self.separator = separator
-        self.split_row = re.compile('[^' + self.separator + ']+') if self.separator is not None else re.compile(r'\w+')
+        self.split_row = _WORD_PATTERN
+
+    def __call__(self, row: TRow) -> TRowsGenerator:
+        if self.separator is not None:
+            # empty parts between adjacent separators are skipped
+            parts = [part for part in row[self.column].split(self.separator) if part]
+        else:
+            parts = self.split_row.findall(row[self.column])
+        if not parts:
+            yield row | {self.column: ''}
+        for part in parts:
+            yield row | {self.column: part}
+
+
+class TextNormalize(Mapper):
+    """Drop punctuation, lower case text and split it on words in one pass,
+    same as FilterPunctuation, LowerCase and Split applied one after another"""
+    def __init__(self, column: str) -> None:
+        """
+        :param column: name of column with text
+        """
+        self.column = column
 
     def __call__(self, row: TRow) -> TRowsGenerator:
-        flag_find = True
-        for found in re.finditer(self.split_row, row[self.column]):
-            dict_to_add = {self.column: found[0]}
-            yield row | dict_to_add
-            flag_find = False
-        if flag_find:
-            dict_to_add = {self.column: ''}
-            yield row | dict_to_add
+        words = _WORD_PATTERN.findall(row[self.column].translate(_PUNCT_DROP_TABLE).lower())
+        for word in words:
+            # words repeat a lot, interned ones are stored once and compared by identity
+            yield row | {self.column: sys.intern(word)}
+        if not words:
+            yield row | {self.column: ''}
 
 
 class Product(Mapper):
@@ -366,7 +592,7 @@ class Product(Mapper):
         self.result_column = result_column
 
     def __call__(self, row: TRow) -> TRowsGenerator:
-        copied_row: TRow = deepcopy(row)
+        copied_row: TRow = row.copy()
         result_product: float = 1
         for column in self.columns:
             result_product *= row[column]
@@ -413,8 +639,18 @@ class TopN(Reducer):
         self.n = n
 
     def __call__(self, group_key: tuple[str, ...], rows: TRowsIterable) -> TRowsGenerator:
-        n_largest = nlargest(self.n, rows, key=lambda row_elem: row_elem[self.column_max])
-        for row in n_largest:
+        column = self.column_max
+        # negated counter keeps earlier rows first among equal values and never lets rows be compared
+        heap: tp.List[tp.Tuple[tp.Any, int, TRow]] = []
+        if self.n > 0:
+            for order, row in enumerate(rows):
+                value = row[column]
+                if len(heap) < self.n:
+                    heappush(heap, (value, -order, row))
+                elif value > heap[0][0]:
+                    heapreplace(heap, (value, -order, row))
+
+        for _, _, row in sorted(heap, reverse=True):
             yield row
 
 
@@ -429,23 +665,18 @@ class TermFrequency(Reducer):
         self.result_column = result_column
 
     def __call__(self, group_key: tuple[str, ...], rows: TRowsIterable) -> TRowsGenerator:
-        grouped_data: tp.DefaultDict[tp.Tuple[tp.Any, ...], tp.DefaultDict[tp.Tuple[tp.Any, ...], int]] = (
-            defaultdict(lambda: defaultdict(int)))
-        group_total: tp.DefaultDict[tp.Tuple[tp.Any, ...], int] = defaultdict(int)
-
-        for row in rows:
-            key: tp.Tuple[tp.Any, ...] = tuple(row[k] for k in group_key)
-            word = row[self.words_column]
-            grouped_data[key][word] += 1
-            group_total[key] += 1
-
-        for key, word_counts in grouped_data.items():
-            total_count = group_total[key]
-            for word, count in word_counts.items():
-                new_row = {k: v for k, v in zip(group_key, key)}
-                new_row[self.result_column] = count / total_count
-                new_row[self.words_column] = word
-                yield new_row
+        rows_iterator = iter(rows)
+        # rows of one group share group_key values, so they are taken from the first row
+        first_row = next(rows_iterator, None)
+        if first_row is None:
+            return
+        word_counts = Counter(map(itemgetter(self.words_column), chain([first_row], rows_iterator)))
+        total_count = sum(word_counts.values())
+        for word, count in word_counts.items():
+            new_row = {k: first_row[k] for k in group_key}
+            new_row[self.result_column] = count / total_count
+            new_row[self.words_column] = word
+            yield new_row
 
 
 class Count(Reducer):
@@ -464,15 +695,74 @@ class Count(Reducer):
         self.column = column
 
     def __call__(self, group_key: tuple[str, ...], rows: TRowsIterable) -> TRowsGenerator:
-        grouped_data: tp.DefaultDict[tp.Tuple[tp.Any, ...], int] = defaultdict(int)
+        first_row: TRow | None = None
+        count = 0
+        for count, row in enumerate(rows, 1):
+            if first_row is None:
+                first_row = row
+
+        if first_row is not None:
+            new_row = {k: first_row[k] for k in group_key}
+            new_row[self.column] = count
+            yield new_row
+
+    def reduce_unsorted(self, group_key: tuple[str, ...], rows: TRowsIterable) -> TRowsGenerator:
+        if type(self).__call__ is not Count.__call__:
+            # subclass reduces groups its own way, counting keys would bypass it
+            yield from super().reduce_unsorted(group_key, rows)
+            return
+        # counting needs only keys of rows, so rows are not kept and keys are counted in C
+        key_counts = Counter(map(key_getter(group_key), rows))
+        for key, count in key_counts.items():
+            new_row = _key_row(group_key, key)
+            new_row[self.column] = count
+            yield new_row
+
+
+class CountDistinct(Reducer):
+    """
+    Count distinct values of column by key
+    Example for group_key=('a',), column='b' and result_column='d'
+        {'a': 1, 'b': 5, 'c': 2}
+        {'a': 1, 'b': 5, 'c': 1}
+        {'a': 1, 'b': 6, 'c': 1}
+        =>
+        {'a': 1, 'd': 2}
+    """
+    def __init__(self, column: str, result_column: str) -> None:
+        """
+        :param column: name of column to count distinct values of
+        :param result_column: name for result column
+        """
+        self.column = column
+        self.result_column = result_column
 
+    def __call__(self, group_key: tuple[str, ...], rows: TRowsIterable) -> TRowsGenerator:
+        first_row: TRow | None = None
+        values: tp.Set[tp.Any] = set()
         for row in rows:
-            key: tp.Tuple[tp.Any, ...] = tuple(row[k] for k in group_key)
-            grouped_data[key] += 1
+            if first_row is None:
+                first_row = row
+            values.add(row[self.column])
+
+        if first_row is not None:
+            new_row = {k: first_row[k] for k in group_key}
+            new_row[self.result_column] = len(values)
+            yield new_row
 
-        for key, word_counts in grouped_data.items():
-            new_row = {k: v for k, v in zip(group_key, key)}
-            new_row[self.column] = grouped_data[key]
+    def reduce_unsorted(self, group_key: tuple[str, ...], rows: TRowsIterable) -> TRowsGenerator:
+        if type(self).__call__ is not CountDistinct.__call__:
+            # subclass reduces groups its own way, collecting distinct values would bypass it
+            yield from super().reduce_unsorted(group_key, rows)
+            return
+        # only distinct values of every group are kept instead of its rows
+        get_key = key_getter(group_key)
+        key_values: tp.DefaultDict[tp.Any, tp.Set[tp.Any]] = defaultdict(set)
+        for row in rows:
+            key_values[get_key(row)].add(row[self.column])
+        for key, values in key_values.items():
+            new_row = _key_row(group_key, key)
+            new_row[self.result_column] = len(values)
             yield new_row
 
 
@@ -492,15 +782,16 @@ class Sum(Reducer):
         self.column = column
 
     def __call__(self, group_key: tuple[str, ...], rows: TRowsIterable) -> TRowsGenerator:
-        grouped_data: tp.DefaultDict[tp.Tuple[tp.Any, ...], int] = defaultdict(int)
-
+        first_row: TRow | None = None
+        total = 0
         for row in rows:
-            key: tp.Tuple[tp.Any, ...] = tuple(row[k] for k in group_key)
-            grouped_data[key] += row[self.column]
+            if first_row is None:
+                first_row = row
+            total += row[self.column]
 
-        for key, word_counts in grouped_data.items():
-            new_row = {k: v for k, v in zip(group_key, key)}
-            new_row[self.column] = grouped_data[key]
+        if first_row is not None:
+            new_row = {k: first_row[k] for k in group_key}
+            new_row[self.column] = total
             yield new_row
 
 
@@ -521,17 +812,18 @@ class Average(Reducer):
         self.column = column
 
     def __call__(self, group_key: tuple[str, ...], rows: TRowsIterable) -> TRowsGenerator:
-        grouped_data: tp.DefaultDict[tp.Tuple[tp.Any, ...], int] = defaultdict(int)
-        group_count: tp.DefaultDict[tp.Tuple[tp.Any, ...], int] = defaultdict(int)
-
+        first_row: TRow | None = None
+        total = 0
+        count = 0
         for row in rows:
-            key: tp.Tuple[tp.Any, ...] = tuple(row[k] for k in group_key)
-            grouped_data[key] += row[self.column]
-            group_count[key] += 1
-
-        for key, word_counts in grouped_data.items():
-            new_row = {k: v for k, v in zip(group_key, key)}
-            new_row[self.column] = grouped_data[key] / group_count[key]
+            if first_row is None:
+                first_row = row
+            total += row[self.column]
+            count += 1
+
+        if first_row is not None:
+            new_row = {k: first_row[k] for k in group_key}
+            new_row[self.column] = total / count
             yield new_row
 
 
@@ -552,7 +844,7 @@ class OuterJoiner(Joiner):
     """Join with outer strategy"""
     def __call__(self, keys: tp.Sequence[str], rows_a: TRowsIterable, rows_b: TRowsIterable) -> TRowsGenerator:
         flag = True
-        copy_rows_b = [row for row in rows_b]
+        copy_rows_b = list(rows_b)
         if len(copy_rows_b):
             for first_row in rows_a:
                 for second_row in copy_rows_b:
@@ -571,24 +863,19 @@ class OuterJoiner(Joiner):
 class LeftJoiner(Joiner):
     """Join with left strategy"""
     def __call__(self, keys: tp.Sequence[str], rows_a: TRowsIterable, rows_b: TRowsIterable) -> TRowsGenerator:
-        flag = True
-        copy_rows_b = [row for row in rows_b]
+        # left rows without a match are still yielded, joined with an empty row
+        copy_rows_b = list(rows_b) or [{}]
         for first_row in rows_a:
-            for second_row in copy_rows_b:
-                if first_row:
+            if first_row:
+                for second_row in copy_rows_b:
                     yield self.join(keys, first_row, second_row)
-            flag = False
-        if not flag:
-            return
-        for second_row in copy_rows_b:
-            yield self.join(keys, {}, second_row)
 
 
 class RightJoiner(Joiner):
     """Join with right strategy"""
     def __call__(self, keys: tp.Sequence[str], rows_a: TRowsIterable, rows_b: TRowsIterable) -> TRowsGenerator:
         flag = True
-        copy_rows_b = [row for row in rows_b]
+        copy_rows_b = list(rows_b)
         for first_row in rows_a:
             for second_row in copy_rows_b:
                 if second_row:
@@ -1,6 +1,6 @@
 import click
+from compgraph.json_rows import read_json_rows, write_json_rows
 import typing as tp
-import json
 from compgraph import algorithms
 
 
@@ -8,11 +8,11 @@ from compgraph import algorithms
 @click.argument('input_file', type=click.File())
 @click.argument('output_file', type=click.File(mode='w'))
 def main(input_file: tp.Any, output_file: tp.Any) -> None:
-    ls = json.loads(input_file.read().replace("\'", '\"'))
+    ls = list(read_json_rows(input_file))
     graph = algorithms.word_count_graph("docs")
 
     result = graph.run(docs=lambda: iter(ls))
-    output_file.write(list(result).__repr__())
+    write_json_rows(output_file, result)
 
 
 if __name__ == '__main__':
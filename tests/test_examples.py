@@ -11,9 +11,10 @@ def test_word_count() -> None:
     runner = CliRunner()
     with runner.isolated_filesystem():
         with open('hello.txt', 'w') as f:
-            f.write(str([{"doc_id": 1, "text": "hello, my little WORLD"},
-                         {"doc_id": 2, "text": "Hello, my little little hell"}])
-                    )
+            f.writelines(json.dumps(row) + '\n' for row in [
+                {"doc_id": 1, "text": "hello, my little WORLD"},
+                {"doc_id": 2, "text": "Hello, my little little hell"}
+            ])
 
         with open('hello2.txt', 'w') as f:
             f.write('')
@@ -30,14 +31,39 @@ def test_word_count() -> None:
         assert result.exit_code == 0
 
         with open('hello2.txt', 'r') as f:
-            assert expected.__str__() == f.readline()
+            assert [json.loads(line) for line in f] == expected
+
+
+def test_word_count_legacy_input() -> None:
+    runner = CliRunner()
+    with runner.isolated_filesystem():
+        with open('hello.txt', 'w') as f:
+            f.write(str([{"doc_id": 1, "text": "hello, my little WORLD"},
+                         {"doc_id": 2, "text": "Hello, my little little hell"},
+                         {"doc_id": 3, "text": "don't", "author": None}]))
+
+        with open('hello2.txt', 'w') as f:
+            f.write('')
+
+        result = runner.invoke(run_word_count.main, ['hello.txt', 'hello2.txt'])
+        assert result.exit_code == 0
+
+        with open('hello2.txt', 'r') as f:
+            assert [json.loads(line) for line in f] == [
+                {'text': 'dont', 'count': 1},
+                {'text': 'hell', 'count': 1},
+                {'text': 'world', 'count': 1},
+                {'text': 'hello', 'count': 2},
+                {'text': 'my', 'count': 2},
+                {'text': 'little', 'count': 3}
+            ]
 
 
 def test_pmi() -> None:
     runner = CliRunner()
     with runner.isolated_filesystem():
         with open('hello.txt', 'w') as f:
-            f.write(str([
+            f.writelines(json.dumps(row) + '\n' for row in [
                 {'doc_id': 1, 'text': 'hello, little world'},
                 {'doc_id': 2, 'text': 'little'},
                 {'doc_id': 3, 'text': 'little little little'},
@@ -45,7 +71,6 @@ def test_pmi() -> None:
                 {'doc_id': 5, 'text': 'HELLO HELLO! WORLD...'},
                 {'doc_id': 6, 'text': 'world? world... world!!! WORLD!!! HELLO!!! HELLO!!!!!!!'}
             ])
-            )
 
         with open('hello2.txt', 'w') as f:
             f.write('')
@@ -61,7 +86,7 @@ def test_pmi() -> None:
         assert result.exit_code == 0
 
         with open('hello2.txt', 'r') as f:
-            help_please = json.loads(f.readline().replace("\'", '\"'))
+            help_please = [json.loads(line) for line in f]
             for i in range(len(help_please)):
                 assert expected[i] == help_please[i]
 
@@ -70,7 +95,7 @@ def test_tf_idf() -> None:
     runner = CliRunner()
     with runner.isolated_filesystem():
         with open('hello.txt', 'w') as f:
-            f.write(str([
+            f.writelines(json.dumps(row) + '\n' for row in [
                 {'doc_id': 1, 'text': 'hello, little world'},
                 {'doc_id': 2, 'text': 'little'},
                 {'doc_id': 3, 'text': 'little little little'},
@@ -78,7 +103,6 @@ def test_tf_idf() -> None:
                 {'doc_id': 5, 'text': 'HELLO HELLO! WORLD...'},
                 {'doc_id': 6, 'text': 'world? world... world!!! WORLD!!! HELLO!!!'}
             ])
-            )
 
         with open('hello2.txt', 'w') as f:
             f.write('')
@@ -104,7 +128,7 @@ def test_tf_idf() -> None:
         assert result.exit_code == 0
 
         with open('hello2.txt', 'r') as f:
-            help_please = json.loads(f.readline().replace("\'", '\"'))
+            help_please = [json.loads(line) for line in f]
             assert sorted(help_please, key=itemgetter('doc_id', 'text')) == expected
 
 
@@ -112,7 +136,7 @@ def test_run_yandex() -> None:
     runner = CliRunner()
     with runner.isolated_filesystem():
         with open('hello.txt', 'w') as f:
-            f.write(str([
+            f.writelines(json.dumps(row) + '\n' for row in [
                 {'start': [37.84870228730142, 55.73853974696249], 'end': [37.8490418381989, 55.73832445777953],
                  'edge_id': 8414926848168493057},
                 {'start': [37.524768467992544, 55.88785375468433], 'end': [37.52415172755718, 55.88807155843824],
@@ -128,10 +152,9 @@ def test_run_yandex() -> None:
                 {'start': [37.83196756616235, 55.76662947423756], 'end': [37.83191015012562, 55.766647034324706],
                  'edge_id': 1293255682152955894},
             ])
-            )
 
         with open('hello1.txt', 'w') as f:
-            f.write(str([
+            f.writelines(json.dumps(row) + '\n' for row in [
                 {'leave_time': '20171020T112238.723000', 'enter_time': '20171020T112237.427000',
                  'edge_id': 8414926848168493057},
                 {'leave_time': '20171011T145553.040000', 'enter_time': '20171011T145551.957000',
@@ -149,7 +172,6 @@ def test_run_yandex() -> None:
                 {'leave_time': '20171027T082600.201000', 'enter_time': '20171027T082557.571000',
                  'edge_id': 5342768494149337085}
             ])
-            )
 
         with open('hello2.txt', 'w') as f:
             f.write('')
@@ -169,5 +191,5 @@ def test_run_yandex() -> None:
         assert result.exit_code == 0
 
         with open('hello2.txt', 'r') as f:
-            help_please = json.loads(f.readline().replace("\'", '\"'))
+            help_please = [json.loads(line) for line in f]
             assert sorted(help_please, key=itemgetter('weekday', 'hour')) == expected
@@ -1,8 +1,12 @@
 import typing as tp
 
+import pytest
+
 from compgraph import operations as ops
 from compgraph import Graph
 from compgraph import ExternalSort
+from compgraph.external_sort import SortedRun, SpilledRows, pick_runs_to_merge
+from compgraph.graph import fuse_maps
 
 
 def test_graph_from_iter() -> None:
@@ -24,6 +28,23 @@ def test_graph_from_file(monkeypatch: tp.Any) -> None:
     assert graph.graphs_to_join == []
 
 
+def test_read_prefetches_file(tmp_path: tp.Any, monkeypatch: tp.Any) -> None:
+    monkeypatch.setattr(ops, 'READ_CHUNK_SIZE', 16)
+    path = tmp_path / 'rows.txt'
+    path.write_text(''.join(f'{i}\n' for i in range(1000)))
+
+    graph = Graph.graph_from_file(str(path), lambda line: {'value': int(line)})
+    assert list(graph.run()) == [{'value': i} for i in range(1000)]
+
+    rows = graph.run()
+    assert next(iter(rows)) == {'value': 0}
+    rows.close()  # type: ignore
+
+    missing_graph = Graph.graph_from_file(str(tmp_path / 'missing.txt'), lambda line: {'value': line})
+    with pytest.raises(FileNotFoundError):
+        list(missing_graph.run())
+
+
 def test_map() -> None:
     graph = Graph.graph_from_iter('data').map(ops.DummyMapper()).map(ops.LowerCase('text'))
     assert isinstance(graph, Graph)
@@ -86,3 +107,159 @@ def test_graph_split_filter_text() -> None:
              .map(ops.Split('text')))
 
     assert list(graph.run(docs=lambda: iter(docs))) == ground_truth
+
+
+def test_fuse_maps() -> None:
+    graph = (Graph.graph_from_iter('docs')
+             .map(ops.FilterPunctuation('text'))
+             .map(ops.LowerCase('text'))
+             .sort(['text'])
+             .map(ops.DummyMapper()))
+
+    fused_operations = fuse_maps(graph.operations[1:])
+    assert len(fused_operations) == 3
+    assert isinstance(fused_operations[0], ops.FusedMap)
+    assert isinstance(fused_operations[1], ExternalSort)
+    assert fused_operations[2] is graph.operations[-1]
+
+
+def test_external_sort_merges_runs() -> None:
+    rows = [{'key': key, 'order': order} for order, key in enumerate([5, 3, 1, 3, 4, 2, 5, 0, 3])]
+
+    result = list(ExternalSort(['key'], run_size=2)(iter(rows)))
+    assert result == sorted(rows, key=lambda row: row['key'])
+
+
+def test_external_sort_merges_in_passes() -> None:
+    rows = [{'key': (order * 7) % 5, 'order': order} for order in range(40)]
+
+    result = list(ExternalSort(['key'], run_size=3, merge_fan_in=2)(iter(rows)))
+    assert result == sorted(rows, key=lambda row: row['key'])
+
+
+@pytest.mark.parametrize('run_size, merge_fan_in', [(0, 2), (3, 1), (3, 0)])
+def test_external_sort_rejects_invalid_sizes(run_size: int, merge_fan_in: int) -> None:
+    with pytest.raises(ValueError):
+        ExternalSort(['key'], run_size=run_size, merge_fan_in=merge_fan_in)
+
+
+def test_pick_runs_to_merge_balances_merges() -> None:
+    runs = [SortedRun(SpilledRows(), size, merge_count)
+            for size, merge_count in [(30, 1), (10, 0), (10, 0), (10, 0), (20, 0)]]
+
+    assert pick_runs_to_merge(runs, 2) == (2, 4)
+    assert pick_runs_to_merge(runs, 4) == (1, 5)
+
+    for run in runs:
+        run.rows.close()
+
+
+def test_clone() -> None:
+    graph = Graph.graph_from_iter('data1').join(ops.InnerJoiner(), Graph.graph_from_iter('data2'), ['key'])
+    cloned_graph = graph.clone()
+    assert cloned_graph is not graph
+    assert cloned_graph.operations == graph.operations
+    assert cloned_graph.operations is not graph.operations
+    assert cloned_graph.graphs_to_join == graph.graphs_to_join
+    assert cloned_graph.graphs_to_join is not graph.graphs_to_join
+
+
+def test_run_computes_shared_prefix_once() -> None:
+    class CountingMapper(ops.Mapper):
+        def __init__(self) -> None:
+            self.calls = 0
+
+        def __call__(self, row: ops.TRow) -> ops.TRowsGenerator:
+            self.calls += 1
+            yield row
+
+    def read_data() -> tp.Any:
+        return iter([{'key': 2, 'value': 'b'}, {'key': 1, 'value': 'a'}])
+
+    counting_mapper = CountingMapper()
+    shared = Graph.graph_from_iter('data').sort(['key']).map(counting_mapper)
+    left = shared.clone().map(ops.Project(['key']))
+    graph = left.join(ops.InnerJoiner(), shared, ['key'])
+
+    assert list(graph.run(data=read_data)) == [{'key': 1, 'value': 'a'}, {'key': 2, 'value': 'b'}]
+    assert counting_mapper.calls == 2
+
+
+def test_run_joins_independent_branch() -> None:
+    def read_left() -> tp.Any:
+        return iter([{'key': 2, 'left': 'b'}, {'key': 1, 'left': 'a'}])
+
+    def read_right() -> tp.Any:
+        return iter([{'key': 1, 'right': 'c'}, {'key': 3, 'right': 'd'}, {'key': 2, 'right': 'e'}])
+
+    right = Graph.graph_from_iter('right').sort(['key'])
+    graph = Graph.graph_from_iter('left').sort(['key']).join(ops.InnerJoiner(), right, ['key'])
+
+    assert list(graph.run(left=read_left, right=read_right)) == [
+        {'key': 1, 'left': 'a', 'right': 'c'},
+        {'key': 2, 'left': 'b', 'right': 'e'}
+    ]
+
+
+class _MissingColumnMapper(ops.Mapper):
+    def __call__(self, row: ops.TRow) -> ops.TRowsGenerator:
+        yield row | {'missing': row['missing']}
+
+
+@pytest.mark.parametrize('with_sort', [True, False])
+def test_run_raises_independent_branch_error(with_sort: bool) -> None:
+    right = Graph.graph_from_iter('right').map(_MissingColumnMapper())
+    right = right.sort(['key']) if with_sort else right.reduce(ops.FirstReducer(), ['key'])
+    graph = Graph.graph_from_iter('left').sort(['key']).join(ops.InnerJoiner(), right, ['key'])
+
+    with pytest.raises(KeyError, match='missing'):
+        list(graph.run(left=lambda: iter([{'key': 1}]), right=lambda: iter([{'key': 1}])))
+
+
+def test_group_reduce() -> None:
+    keys = ['key1', 'key2']
+    graph = Graph.graph_from_iter('data').group_reduce(ops.Count('count'), keys)
+    assert len(graph.operations) == 2
+    assert isinstance(graph.operations[1], ops.HashReduce)
+    assert graph.graphs_to_join == []
+
+    def read_data() -> tp.Any:
+        return iter([{'key1': 1, 'key2': 'b'}, {'key1': 2, 'key2': 'a'}, {'key1': 1, 'key2': 'b'}])
+
+    assert list(graph.run(data=read_data)) == [
+        {'key1': 1, 'key2': 'b', 'count': 2},
+        {'key1': 2, 'key2': 'a', 'count': 1}
+    ]
+    assert list(Graph.graph_from_iter('data').group_reduce(ops.Count('count'), ['key2']).run(data=read_data)) == [
+        {'key2': 'b', 'count': 2},
+        {'key2': 'a', 'count': 1}
+    ]
+    assert list(Graph.graph_from_iter('data').group_reduce(ops.Sum('key1'), ['key2']).run(data=read_data)) == [
+        {'key2': 'b', 'key1': 2},
+        {'key2': 'a', 'key1': 2}
+    ]
+    count_distinct = ops.CountDistinct('key1', 'distinct')
+    assert list(Graph.graph_from_iter('data').group_reduce(count_distinct, ['key2']).run(data=read_data)) == [
+        {'key2': 'b', 'distinct': 1},
+        {'key2': 'a', 'distinct': 1}
+    ]
+    assert list(Graph.graph_from_iter('data').group_reduce(count_distinct, []).run(data=read_data)) == [
+        {'distinct': 2}
+    ]
+
+
+class _LabeledCount(ops.Count):
+    def __call__(self, group_key: tuple[str, ...], rows: ops.TRowsIterable) -> ops.TRowsGenerator:
+        for row in super().__call__(group_key, rows):
+            yield row | {'label': 'counted'}
+
+
+def test_group_reduce_uses_overridden_reducer() -> None:
+    def read_data() -> tp.Any:
+        return iter([{'key': 1}, {'key': 2}, {'key': 1}])
+
+    graph = Graph.graph_from_iter('data').group_reduce(_LabeledCount('count'), ['key'])
+    assert list(graph.run(data=read_data)) == [
+        {'key': 1, 'count': 2, 'label': 'counted'},
+        {'key': 2, 'count': 1, 'label': 'counted'}
+    ]
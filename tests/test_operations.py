@@ -57,8 +57,9 @@ MY_MAP_CASES = [
     ),
     MapCase(
         mapper=ops.Speed(),
-        data=[{'distance': 4, 'time': 360000}, {'distance': 1000, 'time': 72000}],
-        ground_truth=[{'distance': 4, 'time': 360000, 'speed': 0.04}, {'distance': 1000, 'time': 72000, 'speed': 50}],
+        data=[{'distance': 4, 'time': 360000}, {'distance': 1000, 'time': 72000}, {'distance': 0, 'time': 0}],
+        ground_truth=[{'distance': 4, 'time': 360000, 'speed': 0.04}, {'distance': 1000, 'time': 72000, 'speed': 50},
+                      {'distance': 0, 'time': 0, 'speed': 0.0}],
         cmp_keys=("distance", "time", "speed")
     ),
     MapCase(
@@ -92,6 +93,40 @@ MY_MAP_CASES = [
             {'hour': 10, 'datetime': '20231120T101500.000000'},
         ],
         cmp_keys=("datetime", "hour")
+    ),
+    MapCase(
+        mapper=ops.TimeFeatures(),
+        data=[{'datetime': '20231128T191500.000000'}, {'datetime': '20231120T101500.000000'}],
+        ground_truth=[
+            {'weekday': 'Tue', 'hour': 19, 'datetime': '20231128T191500.000000'},
+            {'weekday': 'Mon', 'hour': 10, 'datetime': '20231120T101500.000000'},
+        ],
+        cmp_keys=("datetime", "weekday", "hour")
+    ),
+    MapCase(
+        mapper=ops.Split(column='text', separator='-]'),
+        data=[{'id': 1, 'text': 'a-]b]c-]-]d'}, {'id': 2, 'text': '-]'}],
+        ground_truth=[
+            {'id': 1, 'text': 'a'},
+            {'id': 1, 'text': 'b]c'},
+            {'id': 1, 'text': 'd'},
+            {'id': 2, 'text': ''}
+        ],
+        cmp_keys=('id', 'text'),
+        mapper_ground_truth_items=(0, 1, 2)
+    ),
+    MapCase(
+        mapper=ops.TextNormalize(column='text'),
+        data=[{'id': 1, 'text': 'Hello, my LITTLE world!'}, {'id': 2, 'text': '...'}],
+        ground_truth=[
+            {'id': 1, 'text': 'hello'},
+            {'id': 1, 'text': 'my'},
+            {'id': 1, 'text': 'little'},
+            {'id': 1, 'text': 'world'},
+            {'id': 2, 'text': ''}
+        ],
+        cmp_keys=('id', 'text'),
+        mapper_ground_truth_items=(0, 1, 2, 3)
     )
 ]
 
@@ -139,6 +174,21 @@ MY_REDUCE_CASES = [
         reduce_data_items=(0, 1),
         reduce_ground_truth_items=(0,)
     ),
+    ReduceCase(
+        reducer=ops.CountDistinct(column='b', result_column='d'),
+        reducer_keys=('a',),
+        data=[
+            {'a': 1, 'b': 5, 'c': 2},
+            {'a': 1, 'b': 5, 'c': 1},
+            {'a': 1, 'b': 6, 'c': 1},
+
+            {'a': 2, 'b': 3, 'c': 4},
+        ],
+        ground_truth=[{'a': 1, 'd': 2}, {'a': 2, 'd': 1}],
+        cmp_keys=('a', 'd'),
+        reduce_data_items=(0, 1, 2),
+        reduce_ground_truth_items=(0,)
+    ),
 ]
 
 
@@ -157,3 +207,48 @@ def test_my_reducers(reduce_case: ReduceCase) -> None:
     reduce_result = ops.Reduce(reduce_case.reducer, reduce_case.reducer_keys)(iter(reduce_case.data))
     assert isinstance(reduce_result, tp.Iterator)
     assert sorted(reduce_result, key=key_func) == sorted(reduce_case.ground_truth, key=key_func)
+
+
+@pytest.mark.parametrize('joiner', [ops.InnerJoiner(), ops.LeftJoiner()])
+def test_hash_join_matches_merge_join(joiner: ops.Joiner) -> None:
+    rows_a = [{'key': 1, 'a': 'x'}, {'key': 2, 'a': 'y'}, {'key': 2, 'a': 'z'}, {'key': 4, 'a': 'w'}]
+    rows_b = [{'key': 0, 'b': 'p'}, {'key': 2, 'b': 'q'}, {'key': 3, 'b': 'r'}, {'key': 4, 'b': 's'}]
+
+    hash_join_result = list(ops.Join(joiner, ['key'])(iter(rows_a), iter(rows_b)))
+    merge_join_result = list(ops.Join(joiner, ['key'], broadcast_rows=0)(iter(rows_a), iter(rows_b)))
+    assert hash_join_result == merge_join_result
+
+
+@pytest.mark.parametrize('joiner, rows_a, rows_b, expected', [
+    (ops.LeftJoiner(), [{'key': 1, 'a': 'x'}], [], [{'key': 1, 'a': 'x'}]),
+    (ops.LeftJoiner(), [], [{'key': 1, 'b': 'p'}], []),
+    (ops.RightJoiner(), [{'key': 1, 'a': 'x'}], [], []),
+    (ops.RightJoiner(), [], [{'key': 1, 'b': 'p'}], [{'key': 1, 'b': 'p'}]),
+])
+def test_joiners_with_empty_side(joiner: ops.Joiner, rows_a: tp.List[ops.TRow], rows_b: tp.List[ops.TRow],
+                                 expected: tp.List[ops.TRow]) -> None:
+    assert list(joiner(['key'], iter(rows_a), iter(rows_b))) == expected
+
+
+@pytest.mark.parametrize('joiner', [ops.InnerJoiner(), ops.LeftJoiner()])
+def test_hash_join_falls_back_on_unhashable_keys(joiner: ops.Joiner) -> None:
+    rows_a = [{'key': [1, 2], 'a': 'x'}, {'key': [3, 4], 'a': 'y'}]
+    rows_b = [{'key': [1, 2], 'b': 'p'}, {'key': [5, 6], 'b': 'q'}]
+
+    hash_join_result = list(ops.Join(joiner, ['key'])(iter(rows_a), iter(rows_b)))
+    merge_join_result = list(ops.Join(joiner, ['key'], broadcast_rows=0)(iter(rows_a), iter(rows_b)))
+    assert hash_join_result == merge_join_result
+    assert hash_join_result[0] == {'key': [1, 2], 'a': 'x', 'b': 'p'}
+
+    # right keys are hashable, so only lookups of left keys fail
+    hash_join_result = list(ops.Join(joiner, ['key'])(iter(rows_a), iter([])))
+    merge_join_result = list(ops.Join(joiner, ['key'], broadcast_rows=0)(iter(rows_a), iter([])))
+    assert hash_join_result == merge_join_result
+
+
+def test_merge_join_none_keys() -> None:
+    rows_a = [{'key': None, 'a': 'x'}]
+    rows_b = [{'key': None, 'b': 'p'}]
+
+    result = list(ops.Join(ops.OuterJoiner(), ['key'])(iter(rows_a), iter(rows_b)))
+    assert result == [{'key': None, 'a': 'x', 'b': 'p'}]